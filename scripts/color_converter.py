@@ -1,5 +1,4 @@
 import sys
-import pyperclip
 
 COLOR_MAP = {
     "513b3b": "963333ff",
@@ -31,6 +30,22 @@ COLOR_MAP = {
     "3b3b3b": "333333ff"
 }
 
+# 入力 RGB (24bit int) -> 変換先 RGB (24bit int) / アルファ部
+_MAP_U32 = {int(k, 16): int(v[:6], 16) for k, v in COLOR_MAP.items()}
+_MAP_ALPHA = {int(k, 16): v[6:] for k, v in COLOR_MAP.items()}
+
+
+def convert(input_hex: str):
+    """6 桁の hex（# なし）を変換する。変換先が無ければ None。"""
+    if len(input_hex) != 6:
+        return None
+    try:
+        key = int(input_hex, 16)
+        return f"{_MAP_U32[key]:06x}{_MAP_ALPHA[key]}"
+    except (ValueError, KeyError):
+        return None
+
+
 def main():
     print("hex入力(#なし、空で終了): ", end="", flush=True)
     try:
@@ -39,14 +54,17 @@ def main():
             if not input_hex:
                 break
 
-            input_hex = input_hex.lstrip("#")
+            if input_hex.startswith("#"):
+                input_hex = input_hex[1:]
 
-            out = COLOR_MAP.get(input_hex)
+            out = convert(input_hex)
             if not out:
                 print("変換先なし。")
             else:
                 print(out)
                 try:
+                    # pyperclip は読み込み時にクリップボード機構を探すため、必要になるまで import しない
+                    import pyperclip
                     pyperclip.copy(out)
                 except Exception as e:
                     print(f"クリップボードへのコピーに失敗しました: {e}")
@@ -1,6 +1,7 @@
-"""色ストアの入出力ユーティリティ（YAML）。
+"""色ストアの入出力ユーティリティ（YAML / JSON）。
 
 このモジュールは永続化された色マップを YAML で読み書きする機能を提供します。
+パスの拡張子が `.json` の場合は同じ構造を JSON で読み書きします（PyYAML 不要）。
 フォーマットは次のようにエンティティ ID をトップレベルキーにしたマッピングです::
 
   40:
@@ -10,26 +11,46 @@
 各エントリは `name`（帝国名）と `color`（先頭に `#` を含むカラー文字列）を持ちます。
 
 主な役割:
-- `load_color_store(path)` — YAML を読み込み、{int: { 'name': str|None, 'color': str|None }} を返す
-- `save_color_store(path, mapping)` — マッピングを YAML に保存（`name` を先に、`color` を次に出力）
+- `load_color_store(path)` — YAML / JSON を読み込み、{int: { 'name': str|None, 'color': str|None }} を返す
+- `save_color_store(path, mapping)` — マッピングを YAML / JSON に保存（`name` を先に、`color` を次に出力）
 - 色文字列の正規化（先頭 `#` を保証）
+- 読み込み結果を (mtime, size) をキーにプロセス内キャッシュ（`invalidate(path)` で破棄）
 
 前提:
-- `pyyaml` が必要です（無ければ RuntimeError を投げます）。
+- YAML のストアには `pyyaml` が必要です（無ければ RuntimeError を投げます）。
+- libyaml 付きの PyYAML であれば `CSafeLoader` / `CSafeDumper` を使用します。
 """
 
 from __future__ import annotations
 
+import json
 import os
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+
+
+_YAML_LOADER = None
+_YAML_DUMPER = None
+
+# path -> ((st_mtime_ns, st_size), parsed mapping)
+_CACHE: Dict[str, Tuple[Tuple[int, int], Dict[int, Dict[str, Optional[str]]]]] = {}
 
 
 def _ensure_yaml_available():
+    global _YAML_LOADER, _YAML_DUMPER
     try:
         import yaml
-        return yaml
     except Exception as exc:
         raise RuntimeError("PyYAML is required for color store support. Run: uv sync") from exc
+    if _YAML_LOADER is None or _YAML_DUMPER is None:
+        # libyaml バックエンドがあれば優先し、無ければ純 Python 実装にフォールバックする
+        _YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        _YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    return yaml
+
+
+def is_json_store(path: str) -> bool:
+    """拡張子が `.json` のストアは JSON として扱う。"""
+    return path.lower().endswith(".json")
 
 
 def normalize_color_for_runtime(color: Optional[str]) -> Optional[str]:
@@ -49,17 +70,14 @@ def normalize_color_for_store(color: Optional[str]) -> Optional[str]:
     return color if color.startswith("#") else f"#{color}"
 
 
-def load_color_store(path: str) -> Dict[int, Dict[str, Optional[str]]]:
-    """Load color store from YAML file.
-
-    Returns mapping: {entityId: {"name": str|None, "color": str|None}}
-    """
-    yaml = _ensure_yaml_available()
-    if not os.path.exists(path):
-        return {}
+def _parse_color_store(path: str) -> Dict[int, Dict[str, Optional[str]]]:
     try:
         with open(path, "r", encoding="utf-8") as infile:
-            loaded = yaml.safe_load(infile) or {}
+            if is_json_store(path):
+                loaded = json.load(infile) or {}
+            else:
+                yaml = _ensure_yaml_available()
+                loaded = yaml.load(infile, Loader=_YAML_LOADER) or {}
     except Exception:
         return {}
     out: Dict[int, Dict[str, Optional[str]]] = {}
@@ -79,12 +97,60 @@ def load_color_store(path: str) -> Dict[int, Dict[str, Optional[str]]]:
     return out
 
 
+def _copy_mapping(mapping: Dict[int, Dict[str, Optional[str]]]) -> Dict[int, Dict[str, Optional[str]]]:
+    return {eid: dict(val) for eid, val in mapping.items()}
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_cached(path: str) -> Dict[int, Dict[str, Optional[str]]]:
+    """(mtime_ns, size) が一致する間はパース結果を再利用する。
+
+    呼び出し側が返り値を書き換えてもキャッシュが汚れないようにコピーを返す。
+    """
+    key = _stat_key(path)
+    if key is None:
+        _CACHE.pop(path, None)
+        return {}
+    cached = _CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return _copy_mapping(cached[1])
+    parsed = _parse_color_store(path)
+    _CACHE[path] = (key, parsed)
+    return _copy_mapping(parsed)
+
+
+def invalidate(path: str) -> None:
+    """`path` のキャッシュを破棄する。"""
+    _CACHE.pop(path, None)
+
+
+def load_color_store(path: str) -> Dict[int, Dict[str, Optional[str]]]:
+    """Load color store from a YAML (or `.json`) file.
+
+    Returns mapping: {entityId: {"name": str|None, "color": str|None}}
+    Unchanged files (same mtime and size) are served from an in-process cache.
+    """
+    if not is_json_store(path):
+        _ensure_yaml_available()
+    if not os.path.exists(path):
+        return {}
+    return _load_cached(path)
+
+
 def save_color_store(path: str, mapping: Dict[int, Dict[str, Optional[str]]]) -> None:
-    """Save mapping to YAML file.
+    """Save mapping to a YAML (or `.json`) file.
 
     Expects mapping: {entityId: {"name": str|None, "color": str|None}}
     """
-    yaml = _ensure_yaml_available()
+    as_json = is_json_store(path)
+    yaml = None if as_json else _ensure_yaml_available()
     dirpath = os.path.dirname(path)
     if dirpath:
         os.makedirs(dirpath, exist_ok=True)
@@ -95,4 +161,22 @@ def save_color_store(path: str, mapping: Dict[int, Dict[str, Optional[str]]]) ->
         color = normalize_color_for_store(color)
         dumpable[eid] = {"name": name, "color": color}
     with open(path, "w", encoding="utf-8") as outfile:
-        yaml.safe_dump(dumpable, outfile, allow_unicode=True, sort_keys=False)
+        if as_json:
+            # JSON のキーは文字列になるが、読み込み時に int へ戻す
+            json.dump(dumpable, outfile, ensure_ascii=False, indent=2)
+            outfile.write("\n")
+        else:
+            yaml.dump(dumpable, outfile, Dumper=_YAML_DUMPER, allow_unicode=True, sort_keys=False)
+    # 書き込んだ内容でキャッシュを更新し、次回の load で再パースしないようにする
+    key = _stat_key(path)
+    if key is None:
+        invalidate(path)
+        return
+    cached: Dict[int, Dict[str, Optional[str]]] = {}
+    for eid, val in dumpable.items():
+        try:
+            cached[int(eid)] = {"name": val["name"], "color": normalize_color_for_runtime(val["color"])}
+        except Exception:
+            invalidate(path)
+            return
+    _CACHE[path] = (key, cached)
@@ -9,42 +9,137 @@
 - 見張り塔（watchtower）が占有する 5x5 チャンクブロックを列挙
 
 関数一覧:
-- `smallhex_to_chunk(small_x, small_y)` — SmallHexTile -> (chunk_x, chunk_y)
+- `smallhex_to_chunk(small_x, small_y)` — SmallHexTile -> (chunk_x, chunk_y)（結果をキャッシュ）
+- `smallhex_to_chunk_arr(xy)` — 上記の NumPy 一括版
+- `pack_chunk(cx, cy)` / `unpack_chunk(key)` — チャンク座標と int64 キーの相互変換（`pack_chunk_arr` / `unpack_chunk_arr` は一括版）
 - `chunk_bounds(chunk_x, chunk_y)` — チャンクの四隅 [(x0,y0), ...]
+- `chunk_bounds_batch(chunk_x, chunk_y)` — 上記の NumPy 一括版（`shapely.polygons` 用）
 - `coords_to_feature_polygon(coords)` — GeoJSON の Polygon 座標形式に整形
 - `tower_covered_chunks(small_x, small_y, radius_chunks=2)` — watchtower が占有するチャンク列挙
+- `tower_covered_chunks_batch(small_xy, radius_chunks=2)` — 複数塔の占有チャンクを NumPy で一括算出
 
 このモジュールは外部依存を持たない軽量ユーティリティなので、
 テストや他モジュールからの呼び出しに適しています。
+NumPy（Shapely の依存として導入される）が利用可能な場合のみ一括版を使用できます。
 """
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Iterable, List, Tuple
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except Exception:
+    np = None
+    HAS_NUMPY = False
 
+# SmallHexTile 単位での 1 チャンクの一辺
+CHUNK_SIZE = 96
+
+# チャンク原点からの四隅オフセット（閉じたリング）
+_CHUNK_OFFSETS = ((0, 0), (CHUNK_SIZE, 0), (CHUNK_SIZE, CHUNK_SIZE), (0, CHUNK_SIZE), (0, 0))
+_CHUNK_OFFSETS_ARR = np.asarray(_CHUNK_OFFSETS, dtype=np.float64) if HAS_NUMPY else None
+
+
+@lru_cache(maxsize=65536)
 def smallhex_to_chunk(small_x: int, small_y: int) -> Tuple[int, int]:
-    return (small_x // 96, small_y // 96)
+    return (small_x // CHUNK_SIZE, small_y // CHUNK_SIZE)
+
+
+def smallhex_to_chunk_arr(xy):
+    """Vectorized `smallhex_to_chunk` for an (N, 2) array; returns int32. Requires NumPy."""
+    if not HAS_NUMPY:
+        raise RuntimeError("NumPy is required for smallhex_to_chunk_arr")
+    return (np.asarray(xy, dtype=np.int64) // CHUNK_SIZE).astype(np.int32)
+
+
+def pack_chunk(chunk_x: int, chunk_y: int) -> int:
+    """(chunk_x, chunk_y) を 1 つの int64 キー `(cx << 32) | (cy & 0xffffffff)` に詰める。"""
+    return (chunk_x << 32) | (chunk_y & 0xFFFFFFFF)
+
+
+def unpack_chunk(key: int) -> Tuple[int, int]:
+    """`pack_chunk` の逆変換。"""
+    chunk_y = key & 0xFFFFFFFF
+    if chunk_y >= 0x80000000:
+        chunk_y -= 0x100000000
+    return (key >> 32, chunk_y)
+
+
+def pack_chunk_arr(chunk_x, chunk_y):
+    """Vectorized `pack_chunk`; returns an int64 array. Requires NumPy."""
+    if not HAS_NUMPY:
+        raise RuntimeError("NumPy is required for pack_chunk_arr")
+    chunk_x = np.asarray(chunk_x, dtype=np.int64)
+    chunk_y = np.asarray(chunk_y, dtype=np.int64)
+    return (chunk_x << 32) | (chunk_y & 0xFFFFFFFF)
+
+
+def unpack_chunk_arr(cell_ids):
+    """Vectorized `unpack_chunk`; returns (chunk_x, chunk_y) int32 arrays. Requires NumPy."""
+    if not HAS_NUMPY:
+        raise RuntimeError("NumPy is required for unpack_chunk_arr")
+    cell_ids = np.asarray(cell_ids, dtype=np.int64)
+    return (cell_ids >> 32).astype(np.int32), cell_ids.astype(np.int32)
 
 
 def chunk_bounds(chunk_x: int, chunk_y: int) -> List[Tuple[int, int]]:
-    x0 = chunk_x * 96
-    y0 = chunk_y * 96
-    x1 = (chunk_x + 1) * 96
-    y1 = (chunk_y + 1) * 96
-    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]
+    x0 = chunk_x * CHUNK_SIZE
+    y0 = chunk_y * CHUNK_SIZE
+    return [(x0 + dx, y0 + dy) for dx, dy in _CHUNK_OFFSETS]
 
 
 def coords_to_feature_polygon(coords: List[Tuple[int, int]]):
     return [[list(p) for p in coords]]
 
 
+@lru_cache(maxsize=8)
+def _tower_offsets(radius_chunks: int) -> Tuple[Tuple[int, int], ...]:
+    """塔のチャンクからの (dx, dy) オフセット一覧（dx 外側・dy 内側の順）。半径ごとに一度だけ作る。"""
+    span = range(-radius_chunks, radius_chunks + 1)
+    return tuple((dx, dy) for dx in span for dy in span)
+
+
+@lru_cache(maxsize=8)
+def _tower_offsets_arr(radius_chunks: int):
+    """`_tower_offsets` の (K, 2) int32 配列版（読み取り専用）。"""
+    offsets = np.asarray(_tower_offsets(radius_chunks), dtype=np.int32).reshape(-1, 2)
+    offsets.flags.writeable = False
+    return offsets
+
+
 def tower_covered_chunks(small_x: int, small_y: int, radius_chunks: int = 2) -> Iterable[Tuple[int, int]]:
     """Return chunk coords covered by a watchtower centered at smallhex coords.
 
     Default radius_chunks=2 produces 5x5 block centered on tower chunk.
     """
     cx, cy = smallhex_to_chunk(small_x, small_y)
-    for dx in range(-radius_chunks, radius_chunks + 1):
-        for dy in range(-radius_chunks, radius_chunks + 1):
-            yield (cx + dx, cy + dy)
+    for dx, dy in _tower_offsets(radius_chunks):
+        yield (cx + dx, cy + dy)
+
+
+def tower_covered_chunks_batch(small_xy, radius_chunks: int = 2):
+    """Return chunk coords covered by every tower in ``small_xy`` at once.
+
+    small_xy: (N, 2) array-like of smallhex (x, y) tower coordinates.
+    Returns an (N*(2r+1)**2, 2) int32 array; rows for each tower follow the
+    same order as `tower_covered_chunks`. Requires NumPy.
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("NumPy is required for tower_covered_chunks_batch")
+    chunk_xy = smallhex_to_chunk_arr(np.asarray(small_xy).reshape(-1, 2))
+    out = chunk_xy[:, None, :] + _tower_offsets_arr(radius_chunks)[None, :, :]
+    return out.reshape(-1, 2)
+
+
+def chunk_bounds_batch(chunk_x, chunk_y):
+    """Vectorized `chunk_bounds`; returns an (N, 5, 2) float64 ring array. Requires NumPy.
+
+    The result can be passed straight to `shapely.polygons`.
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("NumPy is required for chunk_bounds_batch")
+    origins = np.stack([np.asarray(chunk_x, dtype=np.float64), np.asarray(chunk_y, dtype=np.float64)], axis=-1) * CHUNK_SIZE
+    return origins[:, None, :] + _CHUNK_OFFSETS_ARR[None, :, :]
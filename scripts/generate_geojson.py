@@ -5,9 +5,9 @@
 `generator_core.py` の実装に処理を委譲します。
 
 主な役割:
-- CLI オプションの解析（出力パス、スロットル、ワーカー数、上限など）
+- CLI オプションの解析（出力パス、レート、ワーカー数、上限など）
 - HTTP セッションとトークンバケット方式の `RateLimiter` の初期化
-- エンパイア一覧の取得と並列での塔取得を行い、
+- エンパイア一覧の取得と並列での塔・エンパイア詳細・クレーム取得を行い、
     `generator_core.process_empires_to_chunkmap` を用いてチャンク所有マップを構築
 - Shapely が利用可能な場合はチャンクポリゴンを結合し、隣接性を計算して色付けし、
     GeoJSON フィーチャを出力。利用不可の場合はチャンク単位のポリゴンを出力
@@ -15,8 +15,9 @@
 依存・前提:
 - Python 3.10+
 - `requests` — BitJita API 呼び出し
-- `pyyaml` — 色ストアの読み書き（`scripts/color_store.py` を使用）
+- `pyyaml` — 色ストアの読み書き（`scripts/color_store.py` を使用。`.json` のストアでは不要）
 - `shapely` — ポリゴンのマージ・隣接判定（起動時に存在チェックを行います）
+- `orjson`（任意）— インストールされていれば Feature のエンコードに使用
 
 使用例:
     uv run generate
@@ -27,53 +28,102 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
+import logging
 import time
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, os.path.dirname(__file__))
+import color_store
 import generator_core
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    orjson = None
+    HAS_ORJSON = False
+
+
+def _encode_feature(feature: dict) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(feature, option=orjson.OPT_INDENT_2)
+    return json.dumps(feature, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def write_feature_collection(path: str, features) -> int:
+    """FeatureCollection を 1 Feature ずつエンコードしながら書き出す。
+
+    全体を 1 つの dict にまとめてから dump しないため、ピークメモリを抑えられる。
+    出力は json.dump(indent=2, ensure_ascii=False) と同じ整形になる。
+    orjson のバイト列はデコードせずにそのまま書き込む。
+    書き出しは `path + ".tmp"` に行い、最後まで書けたときだけ `os.replace` で置き換える。
+    途中で Feature の生成やエンコードに失敗した場合は一時ファイルを消し、既存の出力は残す。
+    書き出した Feature 数を返す。
+    """
+    tmp_path = f"{path}.tmp"
+    count = 0
+    try:
+        with open(tmp_path, "wb") as outfile:
+            outfile.write(b'{\n  "type": "FeatureCollection",\n  "features": [')
+            for feature in features:
+                outfile.write(b",\n    " if count else b"\n    ")
+                outfile.write(_encode_feature(feature).replace(b"\n", b"\n    "))
+                count += 1
+            outfile.write(b"\n  ]\n}" if count else b"]\n}")
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return count
+
 
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--out", default="Resource/generated.geojson", help="Output GeoJSON path")
     ap.add_argument("--user-agent", default=generator_core.DEFAULT_USER_AGENT)
-    ap.add_argument("--throttle-ms", type=int, default=120, help="Minimum ms between API calls (throttle)")
+    ap.add_argument("--throttle-ms", type=int, default=120, help="Deprecated: no longer used; request pacing is controlled by --rate-per-min")
     ap.add_argument("--limit-empires", type=int, default=0, help="Limit number of empires to process (dry-run) -0 for all")
     ap.add_argument("--max-features", type=int, default=0, help="Stop after this many output features (0 = no limit)")
     ap.add_argument("--max-towers-per-empire", type=int, default=0, help="Limit towers processed per empire (0 = no limit)")
     ap.add_argument("--rate-per-min", type=int, default=100, help="Allowed API requests per minute (token-bucket)")
     ap.add_argument("--workers", type=int, default=4, help="Number of threads to use for parallel tower fetching")
     ap.add_argument("--verbose", action="store_true", help="Enable verbose logging for debugging and progress")
-    ap.add_argument("--color-store", default="Resource/color_map.yaml", help="Path to YAML color store for entityId->color mapping")
+    ap.add_argument("--color-store", default="Resource/color_map.yaml", help="Path to YAML color store for entityId->color mapping (a .json path is stored as JSON)")
+    ap.add_argument("--cache-dir", default="Resource/.cache", help="Directory for cached tower/empire/claim API responses (empty string disables)")
     args = ap.parse_args()
 
-    throttle = args.throttle_ms / 1000.0
-
     if not generator_core.HAS_SHAPELY:
         print("Error: Shapely is required for this tool.", file=sys.stderr)
         sys.exit(1)
 
-    try:
-        import yaml  # noqa: F401
-    except Exception:
-        print("Error: PyYAML is required for color store support.", file=sys.stderr)
-        sys.exit(1)
-
-    def log(msg: str) -> None:
-        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        print(f"[{ts}] {msg}", flush=True)
-
-    def debug(msg: str) -> None:
-        if args.verbose:
-            ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-            print(f"[{ts}] {msg}", flush=True)
-
-    session = generator_core.requests.Session()
+    if args.color_store and not color_store.is_json_store(args.color_store):
+        try:
+            import yaml  # noqa: F401
+        except Exception:
+            print("Error: PyYAML is required for color store support.", file=sys.stderr)
+            sys.exit(1)
+
+    # タイムスタンプの整形はハンドラが実際に出力するときだけ行われる
+    logger = logging.getLogger("generate")
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+    log = logger.info
+    debug = logger.debug
+
+    session = generator_core.make_session(args.workers)
     limiter = generator_core.RateLimiter(rate_per_min=args.rate_per_min)
-    client = generator_core.BitJitaClient(session, limiter, args.user_agent)
+    client = generator_core.BitJitaClient(session, limiter, args.user_agent, cache_dir=args.cache_dir)
 
     log("Fetching empires...")
     t_fetch_start = time.perf_counter()
@@ -85,64 +135,59 @@ def main() -> None:
     for empire_entry in empires:
         if args.limit_empires > 0 and len(emps_to_process) >= args.limit_empires:
             break
-        eid = empire_entry.get("entityId")
+        eid = generator_core.coerce_entity_id(empire_entry.get("entityId"))
         if eid is None:
             continue
-        try:
-            eid = int(eid)
-        except Exception:
-            continue
         name = empire_entry.get("name", f"empire-{eid}")
         emps_to_process.append((eid, name))
 
     log(f"Processing {len(emps_to_process)} empires with {args.workers} workers")
 
-    chunkmap, siege_points = generator_core.process_empires_to_chunkmap(emps_to_process, client, args, throttle, log)
+    chunkmap, siege_points = generator_core.process_empires_to_chunkmap(emps_to_process, client, args, log)
 
     empire_info = {}
-    owner_ids = set()
-    for owners in chunkmap.values():
-        for owner in owners:
-            try:
-                owner_ids.add(int(owner[0]))
-            except Exception:
-                try:
-                    owner_ids.add(owner[0])
-                except Exception:
-                    continue
+    known = {}
+    for empire_entry in empires:
+        eid = generator_core.coerce_entity_id(empire_entry.get("entityId"))
+        if eid is not None:
+            known[eid] = empire_entry
+    owner_ids = []
+    for eid in chunkmap.unique_owner_ids():
+        entry = known.get(eid)
+        if entry is not None and all(field in entry for field in generator_core.EMPIRE_DETAIL_FIELDS):
+            empire_info[eid] = entry
+        else:
+            owner_ids.append(eid)
+    if empire_info:
+        debug(f"Reused details for {len(empire_info)} empires from the empire list")
     if owner_ids:
         total = len(owner_ids)
         debug(f"Fetching details for {total} owning empires...")
         success = 0
         failed = 0
-        sorted_ids = sorted(owner_ids, key=lambda x: int(x) if isinstance(x, (int, str)) and str(x).isdigit() else str(x))
-        for idx, eid in enumerate(sorted_ids, start=1):
-            debug(f"Fetching empire details ({idx}/{total}): {eid}")
+
+        def fetch_detail(eid):
             try:
-                detail = client.fetch_empire(eid)
+                return client.fetch_empire(eid)
             except Exception as exc:
                 debug(f"Failed to fetch empire {eid}: {exc}")
-                failed += 1
-                detail = {}
-
-            if not isinstance(detail, dict) or not detail:
-                log(f"No details returned for empire {eid}")
-                failed += 1
-                time.sleep(throttle)
-                continue
+                return {}
+
+        # RateLimiter がリクエスト間隔を制御するため、ここでは sleep せず並列に取得する
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            for idx, (eid, detail) in enumerate(zip(owner_ids, pool.map(fetch_detail, owner_ids)), start=1):
+                if not isinstance(detail, dict) or not detail:
+                    log(f"No details returned for empire {eid}")
+                    failed += 1
+                    continue
 
-            if detail.get("empire") is not None:
-                detail = detail.get("empire") or {}
+                if detail.get("empire") is not None:
+                    detail = detail.get("empire") or {}
 
-            try:
-                key = int(eid)
-            except Exception:
-                key = str(eid)
-            empire_info[key] = detail
-            success += 1
-            cap = detail.get("capitalClaimName") or "(no capital)"
-            debug(f"Fetched ({idx}/{total}) {eid} -> capital: {cap}")
-            time.sleep(throttle)
+                empire_info[eid] = detail
+                success += 1
+                cap = detail.get("capitalClaimName") or "(no capital)"
+                debug(f"Fetched ({idx}/{total}) {eid} -> capital: {cap}")
 
         debug(f"Finished fetching empire details: success={success}, failed={failed}")
 
@@ -152,8 +197,10 @@ def main() -> None:
         prefetch_pages = [1, 2, 3]
         fetched = 0
         debug("Prefetching top-tier claims pages...")
-        for p in prefetch_pages:
-            claims_page = client.fetch_claims_page(sort="tier", limit=100, page=p)
+        # ページは互いに独立しているので同時に取得し、ページ順に結合する
+        with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(prefetch_pages)))) as pool:
+            pages = list(pool.map(lambda p: client.fetch_claims_page(sort="tier", limit=100, page=p), prefetch_pages))
+        for claims_page in pages:
             if not isinstance(claims_page, list):
                 continue
             for c in claims_page:
@@ -166,64 +213,60 @@ def main() -> None:
                     cid = str(eid_raw)
                 claims_map[cid] = c
                 fetched += 1
-            time.sleep(throttle)
         debug(f"Prefetched {fetched} claims from top-tier pages")
     except Exception:
         debug("Failed to prefetch top-tier claims")
 
     # Collect capitalClaimIds that need lookup, then fetch missing ones individually
-    capital_ids_needed = set()
-    for info in empire_info.values():
-        try:
-            capid = info.get("capitalClaimId")
-        except Exception:
-            capid = None
-        if capid:
-            try:
-                capital_ids_needed.add(int(capid))
-            except Exception:
-                capital_ids_needed.add(capid)
+    capital_ids_needed = {generator_core.coerce_entity_id(info.get("capitalClaimId")) for info in empire_info.values() if info.get("capitalClaimId")}
+    capital_ids_needed.discard(None)
 
     # Remove those already found in prefetch
-    remaining = [cid for cid in capital_ids_needed if cid not in claims_map]
+    remaining = sorted(capital_ids_needed - claims_map.keys())
     if remaining:
         debug(f"Fetching {len(remaining)} individual claim(s) not covered by prefetch...")
-        for idx, cid in enumerate(sorted(remaining, key=lambda x: int(x) if isinstance(x, (int, str)) and str(x).isdigit() else str(x)), start=1):
-            debug(f"Fetching claim ({idx}/{len(remaining)}): {cid}")
+
+        def fetch_single_claim(cid):
             try:
-                claim = client.fetch_claim(cid)
+                return client.fetch_claim(cid)
             except Exception as exc:
                 debug(f"Failed to fetch claim {cid}: {exc}")
-                claim = {}
-            if claim and isinstance(claim, dict):
-                try:
-                    key = int(cid)
-                except Exception:
-                    key = str(cid)
-                claims_map[key] = claim
-            time.sleep(throttle)
-        debug(f"Finished fetching individual claims: now have {len(claims_map)} claims in map")
+                return {}
+
+        claim_success = 0
+        claim_failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            for idx, (cid, claim) in enumerate(zip(remaining, pool.map(fetch_single_claim, remaining)), start=1):
+                if not claim or not isinstance(claim, dict):
+                    debug(f"No claim returned ({idx}/{len(remaining)}): {cid}")
+                    claim_failed += 1
+                    continue
+                claims_map[cid] = claim
+                claim_success += 1
+                debug(f"Fetched claim ({idx}/{len(remaining)}): {cid}")
+        debug(f"Finished fetching individual claims: success={claim_success}, failed={claim_failed}; now have {len(claims_map)} claims in map")
 
-    features = []
+    # Feature はリストに溜めず、書き出し時にジェネレータから 1 件ずつ生成する
+    feature_sources = []
     if generator_core.HAS_SHAPELY:
         owner_polys, contested_polys = generator_core.build_owner_and_contested_polys(chunkmap, log)
         merged = generator_core.merge_owner_geometries(owner_polys, log)
         # adjacency = generator_core.build_adjacency(merged, args, log)
         # assigned = generator_core.greedy_coloring(adjacency, generator_core.COLOR_PALETTE, log, args.verbose, args.color_store)
         assigned = generator_core.apply_colors_from_store(merged.keys(), log, args.verbose, args.color_store)
-        features.extend(generator_core.emit_owner_features(merged, assigned, empire_info, claims_map))
-        if contested_polys:
+        feature_sources.append(generator_core.iter_owner_features(merged, assigned, empire_info, claims_map))
+        if len(contested_polys):
             try:
-                merged_contested = generator_core.unary_union(contested_polys)
+                merged_contested = generator_core.union_all(contested_polys)
             except Exception:
                 merged_contested = None
             if merged_contested is not None:
                 geom = generator_core.shapely_mapping(merged_contested)
                 props = {"popupText": "Contested", "color": generator_core.CONTESTED_COLOR, "fillColor": generator_core.CONTESTED_COLOR, "fillOpacity": generator_core.CONTESTED_FILL_OPACITY}
-                features.append({"type": "Feature", "properties": props, "geometry": geom})
+                feature_sources.append(({"type": "Feature", "properties": props, "geometry": geom},))
     else:
         print("Warning: shapely not available — output will contain one polygon per chunk (no merging). Install shapely for merged polygons.")
-        features.extend(generator_core.build_features_from_chunkmap(chunkmap))
+        feature_sources.append(generator_core.iter_features_from_chunkmap(chunkmap))
 
     last_update_str = time.strftime("%Y-%m-%dT%H:%MZ", time.gmtime())
     layer_off = {
@@ -244,12 +287,10 @@ def main() -> None:
             "coordinates": [-5000, -5000]
         }
     }
-    fc = {"type": "FeatureCollection", "features": [layer_off] + features}
     out = args.out
-    with open(out, "w", encoding="utf-8") as outfile:
-        json.dump(fc, outfile, ensure_ascii=False, indent=2)
+    written = write_feature_collection(out, itertools.chain((layer_off,), *feature_sources))
 
-    print(f"Wrote {len(features)} features to {out}")
+    print(f"Wrote {written - 1} features to {out}")
 
 
 if __name__ == "__main__":
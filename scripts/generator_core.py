@@ -7,6 +7,7 @@
 
 主な役割:
 - HTTP クライアントと簡易トークンバケット `RateLimiter` による API 取得
+- 塔一覧・エンパイア／クレーム詳細の ETag 付きディスクキャッシュ
 - 小座標 (SmallHexTile) -> チャンク変換、チャンク四隅の算出
 - 各塔の 5x5 チャンク占有範囲の集計（watchtower extent）
 - Shapely によるチャンクポリゴンの結合と隣接性判定
@@ -17,6 +18,7 @@
 - `requests` — BitJita API 呼び出し
 - `pyyaml` — 色ストアの読み書き（`scripts/color_store.py` を使用）
 - `shapely` — ポリゴンのマージ・隣接判定（起動時に存在チェックを行います）
+- `orjson`（任意）— インストールされていれば API 応答のデコードに使用
 
 設計ノート:
 - CLI は `scripts/generate_geojson.py` にあり、当該モジュールはロジックを提供します。
@@ -29,10 +31,13 @@
 """
 from __future__ import annotations
 
+import json
+import os
 import time
 import threading
 import random
-from collections import defaultdict
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
     from . import color_store as _color_store
@@ -45,14 +50,25 @@ from typing import Any, Dict, List, Set, Tuple
 import requests
 
 try:
+    import shapely
     from shapely.geometry import mapping as shapely_mapping
-    from shapely.ops import unary_union
+    # Shapely 2.x: GEOS の unary union を配列に対して一度に適用する
+    from shapely import union_all, coverage_union_all
     HAS_SHAPELY = True
 except Exception:
+    shapely = None
     shapely_mapping = None
-    unary_union = None
+    union_all = None
+    coverage_union_all = None
     HAS_SHAPELY = False
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    orjson = None
+    HAS_ORJSON = False
+
 BASE_URL = "https://bitjita.com"
 DEFAULT_USER_AGENT = "Map_With_Empire (discord: hu_ja_ja_)"
 
@@ -61,6 +77,13 @@ CONTESTED_COLOR = "#2d2d2d"
 CONTESTED_FILL_OPACITY = 0.5
 OWNER_FILL_OPACITY = 0.4
 
+# 塔座標（SmallHexTile）の有効範囲の上限
+WORLD_MAX = 23040
+
+# emit_owner_features が参照するエンパイア詳細のフィールド。
+# 一覧 API のエントリがこれらを全て持っていれば詳細の再取得は不要。
+EMPIRE_DETAIL_FIELDS = ("capitalClaimId", "capitalClaimName", "capitalRegionId", "locationX", "locationZ")
+
 class RateLimiter:
     """トークンバケット方式の簡易レートリミッタ。
 
@@ -69,38 +92,54 @@ class RateLimiter:
 
     acquire() を呼ぶとトークンが利用可能になるまでブロックします。
     これにより外部 API へ過負荷をかけないようにします。
+
+    状態は「次のトークンが理論上利用可能になる時刻」(TAT, monotonic_ns の整数) 1 つだけで、
+    ロックはこの整数の読み書きの間だけ保持し、待機（sleep）はロックの外で行います（GCRA）。
+    待機するスレッドは自分の分のトークンを予約してから眠るため、起床後に再度競合しません。
     """
     def __init__(self, rate_per_min: int = 250, capacity: int | None = None):
         self.rate_per_min = max(1, int(rate_per_min))
         self.rate_per_sec = self.rate_per_min / 60.0
         default_capacity = min(self.rate_per_min, 10)
         self.capacity = capacity if capacity is not None else default_capacity
-        self._tokens = 0.0
-        self._last = time.monotonic()
+        # 1 トークンあたりの補充間隔（ns）とバースト許容幅
+        self._interval_ns = 60_000_000_000 // self.rate_per_min
+        self._tolerance_ns = max(0, int(self.capacity) - 1) * self._interval_ns
+        # 空のバケットから開始する（最初の 1 件は 1 間隔待つ）
+        self._tat_ns = time.monotonic_ns() + self._tolerance_ns + self._interval_ns
         self._lock = threading.Lock()
 
     def acquire(self, tokens: float = 1.0) -> None:
+        cost_ns = int(tokens * self._interval_ns)
         with self._lock:
-            now = time.monotonic()
-            elapsed = now - self._last
-            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_sec)
-            if self._tokens >= tokens:
-                self._tokens -= tokens
-                self._last = now
-                return
-            needed = tokens - self._tokens
-            wait = needed / self.rate_per_sec
-        time.sleep(wait + 0.01)
-
-
-def _get_with_retries(session: requests.Session, url: str, limiter: RateLimiter, headers: dict, timeout: float = 10.0, max_retries: int = 4):
+            now = time.monotonic_ns()
+            tat = max(self._tat_ns, now)
+            wait_ns = tat - self._tolerance_ns - now
+            self._tat_ns = tat + cost_ns
+        if wait_ns > 0:
+            time.sleep(wait_ns / 1e9)
+
+
+_BACKOFF_BASE = 0.5
+_DEFAULT_MAX_RETRIES = 4
+# attempt (1 始まり) ごとの指数バックオフ秒数
+_BACKOFF = tuple(_BACKOFF_BASE * (2 ** i) for i in range(_DEFAULT_MAX_RETRIES))
+
+
+def _backoff(attempt: int) -> float:
+    if attempt <= len(_BACKOFF):
+        return _BACKOFF[attempt - 1]
+    return _BACKOFF_BASE * (2 ** (attempt - 1))
+
+
+def _get_with_retries(session: requests.Session, url: str, limiter: RateLimiter, headers: dict | None = None, timeout: float = 10.0, max_retries: int = _DEFAULT_MAX_RETRIES):
     """HTTP GET を行い、リトライ/バックオフとレート制御を行うヘルパー。
 
     - limiter.acquire() で事前にレート制御を行う
     - 例外/5xx/429 レスポンス時は指数バックオフでリトライする
     - 成功時は Response を返し、最終的に失敗した場合は例外を発生させる
+    - 共通ヘッダ（User-Agent 等）は session.headers に設定しておき、headers には追加分のみ渡す
     """
-    backoff_base = 0.5
     for attempt in range(1, max_retries + 1):
         limiter.acquire()
         try:
@@ -108,17 +147,16 @@ def _get_with_retries(session: requests.Session, url: str, limiter: RateLimiter,
         except requests.RequestException:
             if attempt == max_retries:
                 raise
-            sleep_for = backoff_base * (2 ** (attempt - 1)) + random.random() * 0.1
-            time.sleep(sleep_for)
+            time.sleep(_backoff(attempt) + random.uniform(0, 0.1))
             continue
 
         if response.status_code == 429:
             retry_after_header = response.headers.get("Retry-After")
             try:
-                wait = float(retry_after_header) if retry_after_header is not None else (backoff_base * (2 ** (attempt - 1)))
+                wait = float(retry_after_header) if retry_after_header is not None else _backoff(attempt)
             except Exception:
-                wait = backoff_base * (2 ** (attempt - 1))
-            time.sleep(wait + random.random() * 0.2)
+                wait = _backoff(attempt)
+            time.sleep(wait + random.uniform(0, 0.2))
             if attempt == max_retries:
                 response.raise_for_status()
             continue
@@ -126,37 +164,127 @@ def _get_with_retries(session: requests.Session, url: str, limiter: RateLimiter,
         if 500 <= response.status_code < 600:
             if attempt == max_retries:
                 response.raise_for_status()
-            sleep_for = backoff_base * (2 ** (attempt - 1)) + random.random() * 0.1
-            time.sleep(sleep_for)
+            time.sleep(_backoff(attempt) + random.uniform(0, 0.1))
             continue
 
         response.raise_for_status()
         return response
 
 
+def _response_json(response: requests.Response):
+    """レスポンス本文を JSON としてデコードする。orjson があればそちらを使う。"""
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            # orjson が受け付けない入力（NaN リテラルなど）は標準の json に任せる
+            pass
+    return response.json()
+
+
+def make_session(workers: int) -> requests.Session:
+    """BitJita 向けの requests.Session を作る。
+
+    接続プールをワーカー数に合わせて確保し、全スレッドが keep-alive 接続を使い回せるようにする。
+    リトライは `_get_with_retries` が RateLimiter を通して行うため、アダプタ側では行わない。
+    """
+    session = requests.Session()
+    pool_size = max(1, int(workers))
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 class BitJitaClient:
-    def __init__(self, session: requests.Session, limiter: RateLimiter, user_agent: str):
+    def __init__(self, session: requests.Session, limiter: RateLimiter, user_agent: str, cache_dir: str | None = None):
         self.session = session
         self.limiter = limiter
         self.user_agent = user_agent
+        # User-Agent はセッションに一度だけ設定し、リクエストごとにヘッダ dict を作らない
+        self.session.headers.update({"User-Agent": user_agent})
+        self.cache_dir = cache_dir or None
+        self._memo: Dict[Tuple[str, str], Any] = {}
+        self._memo_lock = threading.Lock()
+
+    def _get_json_cached(self, kind: str, key, url: str, memo: bool = True):
+        """ID 単位の JSON 応答をプロセス内メモとディスクにキャッシュして返す。
+
+        - 同一プロセス内で同じ (kind, key) は再取得しない（memo=False ならメモしない）
+        - cache_dir が指定されていれば `{cache_dir}/{kind}_{key}.json` に ETag /
+          Last-Modified と共に保存し、次回は条件付き GET を送る（304 ならキャッシュを返す）
+        - 失敗時は例外を送出する（呼び出し側で従来どおり握りつぶす）
+        """
+        memo_key = (kind, str(key))
+        if memo:
+            with self._memo_lock:
+                if memo_key in self._memo:
+                    return self._memo[memo_key]
+
+        cache_path = None
+        cached = None
+        headers: Dict[str, str] = {}
+        if self.cache_dir:
+            cache_path = os.path.join(self.cache_dir, f"{kind}_{key}.json")
+            try:
+                with open(cache_path, "r", encoding="utf-8") as infile:
+                    cached = json.load(infile)
+            except Exception:
+                cached = None
+            if isinstance(cached, dict) and "data" in cached:
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+            else:
+                cached = None
+
+        response = _get_with_retries(self.session, url, self.limiter, headers=headers or None)
+        if response is not None and response.status_code == 304 and cached is not None:
+            data = cached["data"]
+        else:
+            if response is None:
+                return None
+            data = _response_json(response)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if cache_path and (etag or last_modified):
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    tmp_path = f"{cache_path}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as outfile:
+                        json.dump({"etag": etag, "last_modified": last_modified, "data": data}, outfile, ensure_ascii=False)
+                    os.replace(tmp_path, cache_path)
+                except Exception:
+                    pass
+
+        if memo:
+            with self._memo_lock:
+                self._memo[memo_key] = data
+        return data
 
     def fetch_empires(self) -> List[dict]:
         url = f"{BASE_URL}/api/empires"
         try:
-            response = _get_with_retries(self.session, url, self.limiter, headers={"User-Agent": self.user_agent})
+            response = _get_with_retries(self.session, url, self.limiter)
             if response is None:
                 return []
-            return response.json().get("empires", [])
+            return _response_json(response).get("empires", [])
         except Exception:
             return []
 
     def fetch_towers(self, empire_id: int) -> List[dict]:
+        """Fetch the tower list of an empire from /api/empires/{id}/towers.
+
+        Returns a list (empty on error). Responses go through the disk cache
+        (see `_get_json_cached`) so unchanged empires are revalidated with a 304
+        instead of being downloaded again; each empire is fetched once per run,
+        so they are not kept in the in-process memo.
+        """
         url = f"{BASE_URL}/api/empires/{empire_id}/towers"
         try:
-            response = _get_with_retries(self.session, url, self.limiter, headers={"User-Agent": self.user_agent})
-            if response is None:
-                return []
-            return response.json()
+            data = self._get_json_cached("towers", empire_id, url, memo=False)
+            return data if isinstance(data, list) else []
         except Exception:
             return []
 
@@ -164,14 +292,11 @@ class BitJitaClient:
         """Fetch detailed empire info from /api/empires/{id}.
 
         Returns the inner empire object when the API returns a wrapper, or an
-        empty dict on error.
+        empty dict on error. Responses are cached (see `_get_json_cached`).
         """
         url = f"{BASE_URL}/api/empires/{empire_id}"
         try:
-            response = _get_with_retries(self.session, url, self.limiter, headers={"User-Agent": self.user_agent})
-            if response is None:
-                return {}
-            data = response.json()
+            data = self._get_json_cached("empire", empire_id, url)
             if isinstance(data, dict) and data.get("empire") is not None:
                 return data.get("empire") or {}
             if isinstance(data, dict):
@@ -183,14 +308,11 @@ class BitJitaClient:
     def fetch_claim(self, claim_id: int) -> dict:
         """Fetch a single claim by id from /api/claims/{id}.
 
-        Returns claim dict or empty dict on error.
+        Returns claim dict or empty dict on error. Responses are cached (see `_get_json_cached`).
         """
         url = f"{BASE_URL}/api/claims/{claim_id}"
         try:
-            response = _get_with_retries(self.session, url, self.limiter, headers={"User-Agent": self.user_agent})
-            if response is None:
-                return {}
-            data = response.json()
+            data = self._get_json_cached("claim", claim_id, url)
             # API may return the claim object directly or wrapped; try to normalize
             if isinstance(data, dict) and data.get("claim") is not None:
                 return data.get("claim") or {}
@@ -207,10 +329,10 @@ class BitJitaClient:
         """
         url = f"{BASE_URL}/api/claims?sort={sort}&limit={limit}&page={page}"
         try:
-            response = _get_with_retries(self.session, url, self.limiter, headers={"User-Agent": self.user_agent})
+            response = _get_with_retries(self.session, url, self.limiter)
             if response is None:
                 return []
-            data = response.json()
+            data = _response_json(response)
             if isinstance(data, dict) and data.get("claims") is not None:
                 return data.get("claims") or []
             if isinstance(data, list):
@@ -222,65 +344,249 @@ class BitJitaClient:
 
 smallhex_to_chunk = _coords.smallhex_to_chunk
 chunk_bounds = _coords.chunk_bounds
-_coords_to_feature_polygon = _coords.coords_to_feature_polygon
 
 
-def build_features_from_chunkmap(chunkmap: Dict[Tuple[int, int], Set[Tuple[int, str]]]) -> List[dict]:
-    """chunkmap を受け取り、チャンク単位の GeoJSON Feature リストを返す。
+class ChunkOwnerMap:
+    """チャンクごとの所有者集合を CSR 形式（structure-of-arrays）で保持する。
+
+    - cell_ids: 各チャンクの int64 キー（`coords.pack_chunk`）。(chunk_x, chunk_y) 昇順
+    - owner_ids: 全チャンクの所有エンパイア ID を連結した配列（チャンク内は昇順）
+    - offsets: チャンク i の所有者は owner_ids[offsets[i]:offsets[i + 1]]
+    - names: エンパイア ID -> 名前
+
+    タプルキーの dict / set を大量に作らずに済むよう、並列配列で保持する。
+    既存の呼び出し側のために `items()` / `values()` など読み取り専用の
+    マッピング風インタフェースも提供する（値は {(eid, name), ...}）。
+    """
+    def __init__(self, cell_ids, owner_ids, offsets, names: Dict[int, str]):
+        self.cell_ids = cell_ids
+        self.owner_ids = owner_ids
+        self.offsets = offsets
+        self.names = names
+
+    @classmethod
+    def from_pairs(cls, cells, owners, names: Dict[int, str]) -> "ChunkOwnerMap":
+        """(packed_cell, owner_id) の並列バッファから重複を除いて構築する。"""
+        if _coords.HAS_NUMPY:
+            np = _coords.np
+            cell_arr = np.frombuffer(cells, dtype=np.int64) if len(cells) else np.empty(0, dtype=np.int64)
+            owner_arr = np.frombuffer(owners, dtype=np.int64) if len(owners) else np.empty(0, dtype=np.int64)
+            chunk_x = cell_arr >> 32
+            chunk_y = cell_arr.astype(np.int32)
+            order = np.lexsort((owner_arr, chunk_y, chunk_x))
+            cell_arr = cell_arr[order]
+            owner_arr = owner_arr[order]
+            if cell_arr.size:
+                keep = np.ones(cell_arr.size, dtype=bool)
+                keep[1:] = (cell_arr[1:] != cell_arr[:-1]) | (owner_arr[1:] != owner_arr[:-1])
+                cell_arr = cell_arr[keep]
+                owner_arr = owner_arr[keep]
+            # lexsort 済みなので np.unique の return_index はチャンクの先頭位置になる
+            _, first, counts = np.unique(cell_arr, return_index=True, return_counts=True)
+            starts = np.sort(first)
+            cell_ids = cell_arr[starts]
+            offsets = np.empty(cell_ids.size + 1, dtype=np.int64)
+            offsets[:-1] = starts
+            offsets[-1] = cell_arr.size
+            return cls(cell_ids, owner_arr, offsets, names)
+
+        pairs = sorted(set(zip(cells, owners)), key=lambda p: (_coords.unpack_chunk(p[0]), p[1]))
+        cell_ids: List[int] = []
+        owner_ids: List[int] = []
+        offsets: List[int] = []
+        for cell, owner in pairs:
+            if not cell_ids or cell_ids[-1] != cell:
+                cell_ids.append(cell)
+                offsets.append(len(owner_ids))
+            owner_ids.append(owner)
+        offsets.append(len(owner_ids))
+        return cls(cell_ids, owner_ids, offsets, names)
+
+    def __len__(self) -> int:
+        return len(self.cell_ids)
+
+    def counts(self):
+        """各チャンクの所有者数（contested 判定は counts() > 1）。"""
+        if _coords.HAS_NUMPY:
+            return _coords.np.diff(self.offsets)
+        return [self.offsets[i + 1] - self.offsets[i] for i in range(len(self.cell_ids))]
+
+    def unique_owner_ids(self) -> List[int]:
+        """チャンクを 1 つ以上所有するエンパイア ID（int, 昇順）。"""
+        if _coords.HAS_NUMPY:
+            return _coords.np.unique(_coords.np.asarray(self.owner_ids, dtype=_coords.np.int64)).tolist()
+        return sorted(set(self.owner_ids))
+
+    def chunk(self, idx: int) -> Tuple[int, int]:
+        return _coords.unpack_chunk(int(self.cell_ids[idx]))
+
+    def owners_at(self, idx: int) -> Set[Tuple[int, str]]:
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        out = set()
+        for owner in self.owner_ids[start:end]:
+            owner = int(owner)
+            out.add((owner, self.names.get(owner, f"empire-{owner}")))
+        return out
+
+    def __iter__(self):
+        for idx in range(len(self.cell_ids)):
+            yield self.chunk(idx)
+
+    def keys(self):
+        return iter(self)
+
+    def items(self):
+        for idx in range(len(self.cell_ids)):
+            yield self.chunk(idx), self.owners_at(idx)
+
+    def values(self):
+        for idx in range(len(self.cell_ids)):
+            yield self.owners_at(idx)
+
+
+def coerce_entity_id(value) -> int | None:
+    """エンティティ ID を int に正規化する。変換できなければ None。"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_features_from_chunkmap(chunkmap: ChunkOwnerMap) -> List[dict]:
+    """`iter_features_from_chunkmap` の結果をリストで返す。"""
+    return list(iter_features_from_chunkmap(chunkmap))
+
+
+def iter_features_from_chunkmap(chunkmap: ChunkOwnerMap):
+    """chunkmap を受け取り、チャンク単位の GeoJSON Feature を 1 件ずつ生成する。
 
     入力:
-    chunkmap: {(chunk_x,chunk_y): set((eid, name), ...), ...}
+    chunkmap: ChunkOwnerMap
 
         出力:
-            GeoJSON Feature のリスト。各 Feature はチャンクの四角形ポリゴンで、
-            所有者が複数なら 'Contested' 表示、単一なら COLOR_PALETTE から色を選ぶ。
+            GeoJSON Feature を yield する。各 Feature はチャンクの四角形ポリゴンで、
+            所有者が複数なら 'Contested' 表示、単一なら DEFAULT_EMPIRE_COLOR で塗る。
 
     注意点:
       - chunkmap のキーは任意の整数チャンク座標を許す（負値も理論上は可能）
-      - 所有者セットが空のチャンクは無視する
+      - ChunkOwnerMap はチャンク (x, y) 昇順に並んでいるため、そのままの順で出力する
+      - チャンク原点は配列でまとめて計算し、chunk_bounds を都度呼ばずにリングを組み立てる
+    """
+    count = len(chunkmap)
+    if count == 0:
+        return
+    size = _coords.CHUNK_SIZE
+    if _coords.HAS_NUMPY:
+        chunk_x, chunk_y = _coords.unpack_chunk_arr(chunkmap.cell_ids)
+        origin_x = (chunk_x.astype(_coords.np.int64) * size).tolist()
+        origin_y = (chunk_y.astype(_coords.np.int64) * size).tolist()
+        offsets = _coords.np.asarray(chunkmap.offsets).tolist()
+        owner_ids = _coords.np.asarray(chunkmap.owner_ids).tolist()
+    else:
+        origins = [chunkmap.chunk(idx) for idx in range(count)]
+        origin_x = [cx * size for cx, _ in origins]
+        origin_y = [cy * size for _, cy in origins]
+        offsets = list(chunkmap.offsets)
+        owner_ids = list(chunkmap.owner_ids)
+    names = chunkmap.names
+
+    # 同じ所有者（集合）のチャンクは同じ properties を共有する（書き出し時に読むだけなので共有して問題ない）
+    props_cache: Dict[Tuple[int, ...], dict] = {}
+    for idx in range(count):
+        owners = tuple(owner_ids[offsets[idx]:offsets[idx + 1]])
+        props = props_cache.get(owners)
+        if props is None:
+            if len(owners) > 1:
+                owner_names = ", ".join(sorted(names.get(eid, f"empire-{eid}") for eid in owners))
+                props = {"popupText": f"Contested: {owner_names}", "color": CONTESTED_COLOR, "fillColor": CONTESTED_COLOR, "fillOpacity": CONTESTED_FILL_OPACITY}
+            else:
+                empire_name = names.get(owners[0], f"empire-{owners[0]}")
+                color = DEFAULT_EMPIRE_COLOR
+                props = {"popupText": empire_name, "color": color, "fillColor": color, "fillOpacity": OWNER_FILL_OPACITY}
+            props_cache[owners] = props
+        x0 = origin_x[idx]
+        y0 = origin_y[idx]
+        x1 = x0 + size
+        y1 = y0 + size
+        # リングはタプルで組む（書き出し時に読むだけなので list である必要はない）
+        coords_list = (((x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)),)
+        yield {"type": "Feature", "properties": props, "geometry": {"type": "Polygon", "coordinates": coords_list}}
+
+
+def _tower_coord(value) -> float:
+    # JSON 由来の数値以外（None・文字列など）は NaN にして範囲判定で落とす
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return float("nan")
+
+
+def _tower_cells(towers: List[dict], max_towers: int = 0):
+    """塔リストから有効な塔を選び、占有チャンクの packed キー（重複なし）を返す。
+
+    - 'active' が偽の塔、座標が無い・数値でない・範囲外 (<=0 または >WORLD_MAX) の塔は無視する
+    - max_towers > 0 なら有効な塔の先頭 max_towers 件のみ扱う
+
+    戻り値: (cells, towers_handled)。NumPy があれば cells は int64 配列、無ければ int のリスト。
     """
-    features: List[dict] = []
-    for (chunk_x, chunk_y), owners in sorted(chunkmap.items(), key=lambda kv: (kv[0][0], kv[0][1])):
-        coords = chunk_bounds(chunk_x, chunk_y)
-        coords_list = _coords_to_feature_polygon(coords)
-        if len(owners) == 0:
+    towers = [tower for tower in towers if isinstance(tower, dict)]
+    if _coords.HAS_NUMPY:
+        np = _coords.np
+        count = len(towers)
+        xs = np.fromiter((_tower_coord(t.get("locationX")) for t in towers), dtype=np.float64, count=count)
+        ys = np.fromiter((_tower_coord(t.get("locationZ")) for t in towers), dtype=np.float64, count=count)
+        active = np.fromiter((bool(t.get("active", True)) for t in towers), dtype=bool, count=count)
+        # NaN との比較は常に False なので、数値でない座標もここで除外される
+        mask = active & (xs > 0) & (ys > 0) & (xs <= WORLD_MAX) & (ys <= WORLD_MAX)
+        idx = np.flatnonzero(mask)
+        if max_towers > 0:
+            idx = idx[:max_towers]
+        if idx.size == 0:
+            return np.empty(0, dtype=np.int64), 0
+        small_xy = np.stack([xs[idx], ys[idx]], axis=1).astype(np.int64)
+        covered = _coords.tower_covered_chunks_batch(small_xy, radius_chunks=2)
+        cells = np.unique(_coords.pack_chunk_arr(covered[:, 0], covered[:, 1]))
+        return cells, int(idx.size)
+
+    cells = set()
+    towers_handled = 0
+    for tower in towers:
+        if max_towers > 0 and towers_handled >= max_towers:
+            break
+        if not tower.get("active", True):
             continue
-        if len(owners) > 1:
-            owner_names = ", ".join(sorted((n for (_, n) in owners)))
-            props = {"popupText": f"Contested: {owner_names}", "color": CONTESTED_COLOR, "fillColor": CONTESTED_COLOR, "fillOpacity": CONTESTED_FILL_OPACITY}
-        else:
-            empire_id, empire_name = sorted(owners)[0]
-            color = DEFAULT_EMPIRE_COLOR
-            props = {"popupText": empire_name, "color": color, "fillColor": color, "fillOpacity": OWNER_FILL_OPACITY}
-        feature = {"type": "Feature", "properties": props, "geometry": {"type": "Polygon", "coordinates": coords_list}}
-        features.append(feature)
-    return features
-
+        location_x = _tower_coord(tower.get("locationX"))
+        location_y = _tower_coord(tower.get("locationZ"))
+        if not (0 < location_x <= WORLD_MAX and 0 < location_y <= WORLD_MAX):
+            continue
+        for cx, cy in _coords.tower_covered_chunks(int(location_x), int(location_y), radius_chunks=2):
+            cells.add(_coords.pack_chunk(cx, cy))
+        towers_handled += 1
+    return sorted(cells), towers_handled
 
-def process_empires_to_chunkmap(emps_to_process: List[Tuple[int, str]], client: BitJitaClient, args, throttle: float, log) -> Tuple[Dict[Tuple[int, int], Set[Tuple[int, str]]], List[dict]]:
-    from concurrent.futures import ThreadPoolExecutor, as_completed
 
+def process_empires_to_chunkmap(emps_to_process: List[Tuple[int, str]], client: BitJitaClient, args, log) -> Tuple[ChunkOwnerMap, List[dict]]:
     """指定されたエンパイア一覧を処理してチャンクマップを構築する。
 
     入力:
       emps_to_process: [(eid, name), ...] — 処理対象のエンパイア一覧
       client: BitJitaClient — API 呼び出し用クライアント
       args: argparse.Namespace — CLI 引数（workers, max_towers_per_empire などを参照）
-      throttle: float — 各エンパイア処理後に待機する秒数
       log: callable — ログ出力関数
 
     出力:
       (chunkmap, siege_points)
-    - chunkmap: {(chunk_x,chunk_y): set((eid,name), ...)} — チャンクごとの所有者集合
+      - chunkmap: ChunkOwnerMap — チャンクごとの所有者集合（CSR 形式）
       - siege_points: 将来的な利用を想定した位置情報リスト（現状は未使用）
 
     挙動:
       - 並列に各エンパイアの塔を取得し、各塔が占有する 5x5 チャンク範囲を chunkmap に追加する
       - towers の 'active' が False のものは無視する
-      - locationX / locationZ が無い、あるいは範囲外 (<=0 または >23040) は無視する
+      - locationX / locationZ が無い、あるいは範囲外 (<=0 または >WORLD_MAX) は無視する
+      - 塔の選別と 5x5 展開は `_tower_cells` で NumPy によりまとめて行う
       - max_features / max_towers_per_empire が設定されている場合は早期停止する
     """
-    chunkmap: Dict[Tuple[int, int], Set[Tuple[int, str]]] = defaultdict(set)
     siege_points: List[dict] = []
 
     def fetch_emp(emp: Tuple[int, str]):
@@ -297,37 +603,23 @@ def process_empires_to_chunkmap(emps_to_process: List[Tuple[int, str]], client:
             log(f"Failed to fetch towers for {empire_id}: {exc}")
             towers = []
 
-        local_chunks: List[Tuple[int, int]] = []
         local_siege: List[dict] = []
-        towers_handled = 0
-        for tower in towers:
-            if args.max_towers_per_empire > 0 and towers_handled >= args.max_towers_per_empire:
-                break
-            if not tower.get("active", True):
-                continue
-            location_x = tower.get("locationX")
-            location_y = tower.get("locationZ")
-            if location_x is None or location_y is None:
-                continue
-            try:
-                if location_x <= 0 or location_y <= 0 or location_x > 23040 or location_y > 23040:
-                    continue
-            except Exception:
-                continue
-            try:
-                small_x = int(location_x)
-                small_y = int(location_y)
-            except Exception:
-                continue
-            for (cx, cy) in _coords.tower_covered_chunks(small_x, small_y, radius_chunks=2):
-                local_chunks.append((cx, cy))
-            towers_handled += 1
+        local_cells, towers_handled = _tower_cells(towers, args.max_towers_per_empire)
+
+        return (empire_id, empire_name, local_cells, local_siege, towers_handled)
 
-        return (empire_id, empire_name, local_chunks, local_siege, towers_handled)
+    # 所有者 ID は取り込み時に一度だけ int に揃え、以降は int として扱う
+    valid_emps: List[Tuple[int, str]] = []
+    for raw_id, empire_name in emps_to_process:
+        empire_id = coerce_entity_id(raw_id)
+        if empire_id is None:
+            log(f"Skipping empire with non-integer id: {raw_id!r}")
+            continue
+        valid_emps.append((empire_id, empire_name))
 
     results = []
     with ThreadPoolExecutor(max_workers=args.workers) as pool:
-        futures = {pool.submit(fetch_emp, emp): emp for emp in emps_to_process}
+        futures = {pool.submit(fetch_emp, emp): emp for emp in valid_emps}
         for fut in as_completed(futures):
             try:
                 res = fut.result()
@@ -336,11 +628,17 @@ def process_empires_to_chunkmap(emps_to_process: List[Tuple[int, str]], client:
                 continue
             if res:
                 results.append(res)
-            time.sleep(throttle)
 
-    for empire_id, empire_name, local_chunks, local_siege, towers_handled in sorted(results, key=lambda r: (r[0], r[1])):
-        for cx, cy in sorted(set(local_chunks), key=lambda c: (c[0], c[1])):
-            chunkmap[(cx, cy)].add((empire_id, empire_name))
+    cells = array("q")
+    owners = array("q")
+    names: Dict[int, str] = {}
+    for empire_id, empire_name, local_cells, local_siege, towers_handled in sorted(results, key=lambda r: (r[0], r[1])):
+        names[empire_id] = empire_name
+        if _coords.HAS_NUMPY:
+            cells.frombytes(local_cells.tobytes())
+        else:
+            cells.extend(local_cells)
+        owners.extend([empire_id] * len(local_cells))
         siege_points.extend(local_siege)
         if getattr(args, "verbose", False):
             try:
@@ -348,36 +646,48 @@ def process_empires_to_chunkmap(emps_to_process: List[Tuple[int, str]], client:
             except Exception:
                 pass
 
+    chunkmap = ChunkOwnerMap.from_pairs(cells, owners, names)
     return chunkmap, siege_points
 
 
 def build_owner_and_contested_polys(chunkmap, log):
-    """chunkmap から Shapely ポリゴンを作り、所有者ごとと競合ポリゴンに分類して返す。
+    """chunkmap (ChunkOwnerMap) から Shapely ポリゴンを作り、所有者ごとと競合ポリゴンに分類して返す。
 
     出力:
-      - owner_polys: {(eid,name): [Polygon, ...]}
-      - contested_polys: [Polygon, ...]
+      - owner_polys: {(eid,name): ndarray[Polygon]}
+      - contested_polys: ndarray[Polygon]
 
     注意:
       - Shapely が利用不可な場合は空を返す
-      - chunk_bounds の順序 (四隅) をそのまま Polygon に渡している
+      - 全チャンクの四隅を (N, 5, 2) 配列にして `shapely.polygons` で一括生成し、
+        所有者ごとの分類も NumPy のソートで行う（チャンクごとの Python ループはしない）
+      - チャンク矩形は辺でしか接しないため、所有者ごとの配列はそのまま
+        `coverage_union_all` に渡せる有効な coverage になる
     """
-    owner_polys: Dict[Tuple[int, str], List] = defaultdict(list)
+    owner_polys: Dict[Tuple[int, str], Any] = {}
     contested_polys: List = []
     if not HAS_SHAPELY:
         return owner_polys, contested_polys
-    from shapely.geometry import Polygon as _Polygon
-    for (chunk_x, chunk_y), owners in sorted(chunkmap.items(), key=lambda kv: (kv[0][0], kv[0][1])):
-        coords = chunk_bounds(chunk_x, chunk_y)
-        try:
-            polygon = _Polygon(coords)
-        except Exception:
-            continue
-        if len(owners) == 1:
-            empire_id, empire_name = sorted(owners)[0]
-            owner_polys[(empire_id, empire_name)].append(polygon)
-        elif len(owners) > 1:
-            contested_polys.append(polygon)
+    np = _coords.np
+    if len(chunkmap) == 0:
+        return owner_polys, contested_polys
+    counts = np.asarray(chunkmap.counts())
+    offsets = np.asarray(chunkmap.offsets)
+    owner_ids = np.asarray(chunkmap.owner_ids, dtype=np.int64)
+    chunk_x, chunk_y = _coords.unpack_chunk_arr(chunkmap.cell_ids)
+    polys = shapely.polygons(_coords.chunk_bounds_batch(chunk_x, chunk_y))
+
+    contested_polys = polys[counts > 1]
+    single = counts == 1
+    single_owners = owner_ids[offsets[:-1][single]]
+    single_polys = polys[single]
+    if single_owners.size:
+        order = np.argsort(single_owners, kind="stable")
+        uniq, starts = np.unique(single_owners[order], return_index=True)
+        ends = np.append(starts[1:], order.size)
+        for empire_id, start, end in zip(uniq.tolist(), starts.tolist(), ends.tolist()):
+            empire_name = chunkmap.names.get(empire_id, f"empire-{empire_id}")
+            owner_polys[(empire_id, empire_name)] = single_polys[order[start:end]]
     return owner_polys, contested_polys
 
 
@@ -386,27 +696,31 @@ def merge_owner_geometries(owner_polys, log):
     if not HAS_SHAPELY:
         return merged_owner_geoms
     t_merge_start = time.perf_counter()
+    keys = []
+    merged_list = []
     for (empire_id, empire_name), polys in owner_polys.items():
+        # チャンク矩形は重ならないので、汎用の union_all より速い coverage union を使う
         try:
-            from shapely.ops import unary_union as _unary_union
+            merged = coverage_union_all(polys)
         except Exception:
-            _unary_union = None
-        if _unary_union is None:
-            merged = None
-        else:
             try:
-                merged = _unary_union(polys)
+                merged = union_all(polys)
             except Exception:
                 merged = None
         if merged is not None:
-            merged_owner_geoms[(empire_id, empire_name)] = merged
+            keys.append((empire_id, empire_name))
+            merged_list.append(merged)
+    if merged_list:
+        # coverage union はチャンク境界の同一直線上の頂点を残すので、許容誤差 0 で取り除く
+        merged_list = shapely.simplify(_coords.np.asarray(merged_list, dtype=object), 0).tolist()
+    merged_owner_geoms = dict(zip(keys, merged_list))
     t_merge_end = time.perf_counter()
     log(f"Merged owner polygons: {len(merged_owner_geoms)} owners (took {t_merge_end - t_merge_start:.2f}s)")
     return merged_owner_geoms
 
 
 def apply_colors_from_store(nodes, log, verbose: bool, color_store_path: str | None = None):
-    """YAMLストアから色を適用する。ストアにない場合はデフォルト色を使用する。
+    """色ストア（YAML / JSON）から色を適用する。ストアにない場合はデフォルト色を使用する。
 
     - 既存の色があればそれを優先して使う。
     - ストアにない場合はデフォルト色(#FF5500ff)を使用し、ストアに保存する。
@@ -467,107 +781,92 @@ def apply_colors_from_store(nodes, log, verbose: bool, color_store_path: str | N
     return assigned_color
 
 
+def _capital_tier(info: dict, claims_map: dict | None):
+    """capitalClaimId から claims_map を引いて首都クレームの tier を返す（無ければ None）。"""
+    cap_id = info.get("capitalClaimId")
+    if cap_id is None or not claims_map:
+        return None
+    claim_key = coerce_entity_id(cap_id)
+    claim = claims_map.get(claim_key if claim_key is not None else str(cap_id))
+    if claim and isinstance(claim, dict):
+        return claim.get("tier")
+    return None
+
+
+def _owner_popup(empire_name: str, info, claims_map: dict | None) -> List[str]:
+    """所有者 Feature の popupText（名前, 空行, 首都, リージョン, 位置）を組み立てる。
+
+    info が無ければ名前だけの 1 行を返す。値が欠けている行は空文字にする。
+    """
+    if not info:
+        return [empire_name]
+
+    cap_name = info.get("capitalClaimName")
+    capital = ""
+    if cap_name:
+        # Capital line: include tier if available as (T{tier})
+        tier_val = _capital_tier(info, claims_map)
+        capital = f"Capital : {cap_name} (T{tier_val})" if tier_val is not None else f"Capital : {cap_name}"
+
+    cap_region = info.get("capitalRegionId")
+    region = f"Region : {cap_region}" if cap_region is not None else ""
+
+    location = ""
+    lx = info.get("locationX")
+    lz = info.get("locationZ")
+    if lx is not None and lz is not None:
+        try:
+            location = f"Location : N {round(float(lz) / 3.0)} E {round(float(lx) / 3.0)}"
+        except (TypeError, ValueError, OverflowError):
+            location = ""
+
+    return [empire_name, "", capital, region, location]
+
+
 def emit_owner_features(merged_owner_geoms, assigned_color, empire_info: dict | None = None, claims_map: dict | None = None):
-    """マージ済みジオメトリと色割り当てから GeoJSON Feature を生成する。
+    """`iter_owner_features` の結果をリストで返す。"""
+    return list(iter_owner_features(merged_owner_geoms, assigned_color, empire_info, claims_map))
+
+
+def iter_owner_features(merged_owner_geoms, assigned_color, empire_info: dict | None = None, claims_map: dict | None = None):
+    """マージ済みジオメトリと色割り当てから GeoJSON Feature を 1 件ずつ生成する。
 
     入力:
       merged_owner_geoms: {(eid,name): shapely_geom}
       assigned_color: {(eid,name): color_hex}
 
     出力:
-      GeoJSON Feature リスト。各 Feature は mapping() によって GeoJSON 互換の dict に変換される。
+      GeoJSON Feature を yield する。ジオメトリは `shapely.to_geojson` で全所有者分を一括で
+      GeoJSON 文字列にし、Feature を生成するときに 1 件ずつ dict へデコードする。
+      ストリーミング書き出しと組み合わせ、全 Feature を同時に保持しないようにする。
 
     注意:
-      - Shapely が利用不可なら空リストを返す
-      - mapping() 呼び出しが失敗するジオメトリはスキップされる
+      - Shapely が利用不可なら何も生成しない
+      - 一括変換に失敗した場合は mapping() で 1 件ずつ変換し、失敗したジオメトリはスキップする
     """
-    features: List[dict] = []
     if not HAS_SHAPELY:
-        return features
-    for owner_key, geom in sorted(merged_owner_geoms.items(), key=lambda kv: (kv[0][0], kv[0][1])):
+        return
+    owners = sorted(merged_owner_geoms.items(), key=lambda kv: (kv[0][0], kv[0][1]))
+    try:
+        geom_strs = shapely.to_geojson(_coords.np.asarray([geom for _, geom in owners], dtype=object)).tolist()
+    except Exception:
+        geom_strs = [None] * len(owners)
+    loads = orjson.loads if HAS_ORJSON else json.loads
+    for (owner_key, geom), geom_str in zip(owners, geom_strs):
         try:
-            from shapely.geometry import mapping as _mapping
-        except Exception:
-            _mapping = None
-        if _mapping is None:
-            continue
-        try:
-            geom_json = _mapping(geom)
+            geom_json = loads(geom_str) if geom_str is not None else shapely_mapping(geom)
         except Exception:
             continue
         empire_id, empire_name = owner_key
         color = assigned_color.get(owner_key, DEFAULT_EMPIRE_COLOR)
 
-        popup = [empire_name, "", "", "", ""]
         info = None
         if empire_info is not None:
-            try:
-                info = empire_info.get(int(empire_id))
-            except Exception:
-                info = empire_info.get(str(empire_id))
+            eid = coerce_entity_id(empire_id)
+            info = empire_info.get(eid if eid is not None else str(empire_id))
         if info and isinstance(info, dict) and info.get("empire") is not None:
             info = info.get("empire")
-
-        if info:
-            cap_name = info.get("capitalClaimName")
-            cap_region = info.get("capitalRegionId")
-
-            # Tier: try to lookup via claims_map using capitalClaimId
-            tier_val = None
-            try:
-                cap_id = info.get("capitalClaimId")
-                if cap_id is not None and claims_map is not None:
-                    try:
-                        claim_key = int(cap_id)
-                    except Exception:
-                        claim_key = str(cap_id)
-                    claim = claims_map.get(claim_key)
-                    if not claim and isinstance(claim_key, str):
-                        try:
-                            claim = claims_map.get(int(claim_key))
-                        except Exception:
-                            claim = None
-                    if claim and isinstance(claim, dict):
-                        tier_val = claim.get("tier")
-            except Exception:
-                tier_val = None
-
-            # Capital line: include tier if available as (T{tier})
-            try:
-                if cap_name:
-                    if tier_val is not None:
-                        popup[2] = f"Capital : {cap_name} (T{tier_val})"
-                    else:
-                        popup[2] = f"Capital : {cap_name}"
-                else:
-                    popup[2] = ""
-            except Exception:
-                popup[2] = ""
-
-            # Region line
-            try:
-                if cap_region is not None:
-                    popup[3] = f"Region : {cap_region}"
-                else:
-                    popup[3] = ""
-            except Exception:
-                popup[3] = ""
-
-            # Location line
-            lx = info.get("locationX")
-            lz = info.get("locationZ")
-            try:
-                if lx is not None and lz is not None:
-                    e = round(float(lx) / 3.0)
-                    n = round(float(lz) / 3.0)
-                    popup[4] = f"Location : N {n} E {e}"
-                else:
-                    popup[4] = ""
-            except Exception:
-                popup[4] = ""
-        else:
-            popup = [empire_name]
+        popup = _owner_popup(empire_name, info, claims_map)
 
         props = {"popupText": popup, "color": color, "fillColor": color, "fillOpacity": OWNER_FILL_OPACITY}
-        features.append({"type": "Feature", "properties": props, "geometry": geom_json})
-    return features
+        yield {"type": "Feature", "properties": props, "geometry": geom_json}